@@ -0,0 +1,104 @@
+"""Benchmarks of the pure-Python metadata pipeline on a synthetic overview.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.run_benchmarks --resources 20 --files 200 --profile
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import ELEMENTS, load_overview, write_overview_hdf
+from utils.meta_data_worker import WorkCoscineOverview
+from utils.profiling import profiler
+from utils.utils import Compound
+
+
+def _time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _compound_conversions(compositions):
+    for composition in compositions:
+        Compound(dict(composition)).wt_percent_dict
+        Compound.from_wt_percent(dict(composition)).at_percent_dict
+
+
+def run(
+    n_schemes=3, n_resources=10, n_files=100, n_elements=3, n_comment_lines=5, repeat=5, seed=0, profile=False,
+    trace_memory=False,
+):
+    """Time each stage of the pipeline and return a dict of stage name to list of timings in seconds.
+
+    With profile=True the profiling hooks are enabled while the stages run, see utils.profiling.profiler.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        file_name = os.path.join(tmp, "CoScInE_Overview")
+        write_overview_hdf(
+            file_name, n_schemes=n_schemes, n_resources=n_resources, n_files=n_files, n_elements=n_elements,
+            n_comment_lines=n_comment_lines, seed=seed,
+        )
+        co = load_overview(file_name)
+
+    worker = WorkCoscineOverview(co)
+    _, sample_df = worker._get_metadata("Sample")
+    extended_sample_df = worker.extend_sample_comments(sample_df)
+    rng = random.Random(seed)
+    compositions = [
+        {element: rng.uniform(1, 50) for element in rng.sample(ELEMENTS, n_elements)} for _ in range(n_files)
+    ]
+
+    stages = {
+        "_sort_res_into_schemes": lambda: WorkCoscineOverview(co),
+        "get_file_idx": lambda: [worker.get_file_idx(scheme) for scheme in worker.scheme_list],
+        "_get_metadata": lambda: [worker._get_metadata(scheme) for scheme in worker.scheme_list],
+        "extend_sample_comments": lambda: worker.extend_sample_comments(sample_df),
+        "get_T_c": lambda: worker.get_T_c(extended_sample_df),
+        "Compound conversions": lambda: _compound_conversions(compositions),
+    }
+    if profile:
+        profiler.reset()
+        profiler.enable(trace_memory=trace_memory)
+    try:
+        return {name: _time(func, repeat) for name, func in stages.items()}
+    finally:
+        profiler.disable()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--schemes", type=int, default=3, help="number of schemes")
+    parser.add_argument("--resources", type=int, default=10, help="resources per scheme")
+    parser.add_argument("--files", type=int, default=100, help="files per resource")
+    parser.add_argument("--elements", type=int, default=3, help="elements per sample composition")
+    parser.add_argument("--comment-lines", type=int, default=5, help="additional lines per sample comment")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of each stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", action="store_true", help="report per-stage timings and net allocated blocks")
+    parser.add_argument("--trace-memory", action="store_true", help="with --profile, also trace allocated bytes")
+    args = parser.parse_args(argv)
+
+    results = run(
+        n_schemes=args.schemes, n_resources=args.resources, n_files=args.files, n_elements=args.elements,
+        n_comment_lines=args.comment_lines, repeat=args.repeat, seed=args.seed, profile=args.profile,
+        trace_memory=args.trace_memory,
+    )
+
+    print(f"{'stage':<25} {'best [s]':>10} {'median [s]':>11}")
+    for name, timings in results.items():
+        print(f"{name:<25} {min(timings):>10.4f} {statistics.median(timings):>11.4f}")
+    if args.profile:
+        print()
+        print(profiler.report())
+
+
+if __name__ == "__main__":
+    main()
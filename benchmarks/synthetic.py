@@ -0,0 +1,130 @@
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+from pyiron_base import FileHDFio
+
+from utils.coscine_overview import CoscineOverview
+
+ELEMENTS = ["Fe", "Cr", "Ni", "Mn", "Mo", "Co", "Cu", "Al", "Ti", "Si"]
+
+
+def _sample_comment(rng, sample_id, n_elements, n_comment_lines):
+    elements = rng.sample(ELEMENTS, n_elements)
+    lines = [
+        f"Sample {sample_id}",
+        "----",
+        f"Date: {(datetime(2022, 1, 1) + timedelta(days=rng.randrange(365))).isoformat()}",
+        f"Reduction temp[°C]: {rng.choice([800, 900, 1000])}",
+        f"Annealing Temp.[°C]: {rng.choice([400, 500, 600])}",
+        f"Annealing Time[h]: {rng.choice([1, 2, 24])}",
+    ]
+    for key in ["Target wt.%", "Actual wt.%"]:
+        lines.append(f"{key}{elements[0]}: base")
+        for element in elements[1:]:
+            lines.append(f"{key}{element}: {rng.uniform(0.5, 20):.2f}")
+        lines.append(f"{key}Div.: {rng.randrange(1, 9)},{rng.randrange(10)} Nb")
+    for line_no in range(n_comment_lines):
+        lines.append(f"Note {line_no}: {rng.choice(['polished', 'etched', 'as cast'])}")
+    return "\n".join(lines)
+
+
+def generate_overview_data(n_schemes=3, n_resources=10, n_files=100, n_elements=3, n_comment_lines=5, seed=0):
+    """Generate projects, resources and files in the layout of CoscineOverview.
+
+    One project per scheme below a common top level project, with n_resources resources of n_files files each. The
+    first scheme is 'Sample', whose files carry comments parsed by WorkCoscineOverview.extend_sample_comments.
+
+    Args:
+        n_schemes(int): Number of schemes.
+        n_resources(int): Number of resources per scheme.
+        n_files(int): Number of files per resource.
+        n_elements(int): Number of elements in the composition of each sample.
+        n_comment_lines(int): Number of additional free-form lines in each sample comment.
+        seed(int): Seed of the random generator.
+
+    Returns:
+        dict: With keys 'projects', 'resources' and 'files'.
+    """
+    rng = random.Random(seed)
+    scheme_names = ["Sample"] + [f"Scheme{idx}" for idx in range(1, n_schemes)]
+    projects = [{"id": "pr-0", "path": "", "name": "Benchmark", "parent": None, "resources": [], "sub_projects": []}]
+    resources = []
+    files = []
+    for scheme in scheme_names:
+        pr_idx = len(projects)
+        projects[0]["sub_projects"].append(pr_idx)
+        projects.append(
+            {"id": f"pr-{pr_idx}", "path": "/Benchmark", "name": scheme, "parent": 0, "resources": [], "sub_projects": []}
+        )
+        if scheme == "Sample":
+            meta_data_fields = {"ID": {"required": True, "options": []}, "Comments": {"required": False, "options": []}}
+        else:
+            meta_data_fields = {
+                "ID": {"required": True, "options": []},
+                "Sample ID": {"required": True, "options": []},
+                "Method": {"required": False, "options": ["A", "B", "C"]},
+                "Comments": {"required": False, "options": []},
+            }
+        for _ in range(n_resources):
+            res_idx = len(resources)
+            projects[pr_idx]["resources"].append(res_idx)
+            res_path = f"/Benchmark/{scheme}/Resource{res_idx}"
+            res_dict = {
+                "id": f"res-{res_idx}",
+                "path": res_path,
+                "project": pr_idx,
+                "meta_data_fields": meta_data_fields,
+                "name": f"Resource{res_idx}",
+                "profile": f"https://purl.org/coscine/ap/{scheme}/",
+                "files": [],
+            }
+            resources.append(res_dict)
+            for _ in range(n_files):
+                file_idx = len(files)
+                sample_id = f"S_{file_idx}"
+                if scheme == "Sample":
+                    metadata = {
+                        "ID": sample_id,
+                        "Comments": _sample_comment(rng, sample_id, n_elements, n_comment_lines),
+                    }
+                else:
+                    metadata = {
+                        "ID": f"{scheme}_{file_idx}",
+                        "Sample ID": f"S_{rng.randrange(n_files)}",
+                        "Method": rng.choice(["A", "B", "C"]),
+                        "Comments": "",
+                    }
+                name = f"{sample_id}.csv"
+                files.append(
+                    {
+                        "id": name,
+                        "path": res_path + "/" + name,
+                        "name": name,
+                        "metadata": metadata,
+                        "size": rng.randrange(1, 10**7),
+                        "modified": (datetime(2022, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=file_idx)).isoformat(
+                            timespec="microseconds"
+                        ),
+                        "project": pr_idx,
+                        "resource": res_idx,
+                    }
+                )
+                res_dict["files"].append(file_idx)
+            res_dict["size"] = sum([files[file_idx]["size"] for file_idx in res_dict["files"]])
+    return {"projects": projects, "resources": resources, "files": files}
+
+
+def write_overview_hdf(file_name, **kwargs):
+    """Write synthetic data (see generate_overview_data for kwargs) in the HDF layout of CoscineOverview."""
+    data = generate_overview_data(**kwargs)
+    hdf = FileHDFio(file_name=file_name)
+    hdf["download_time"] = datetime.now().isoformat()
+    hdf["projects"] = json.dumps(data["projects"])
+    hdf["files"] = json.dumps(data["files"])
+    hdf["resources"] = json.dumps(data["resources"])
+    return hdf
+
+
+def load_overview(file_name):
+    return CoscineOverview(file_name=file_name, read_only=True)
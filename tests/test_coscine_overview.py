@@ -0,0 +1,99 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from benchmarks.synthetic import write_overview_hdf
+from utils.coscine_overview import CoscineOverview
+
+
+class _BlockingClient:
+    """Client whose projects request blocks until released, or fails right away."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def projects(self, *args, **kwargs):
+        self.started.set()
+        if self.error is not None:
+            raise self.error
+        self.release.wait(timeout=10)
+        return []
+
+
+class TestCoscineOverview(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        file_name = os.path.join(self._tmp.name, "CoScInE_Overview")
+        write_overview_hdf(file_name, n_schemes=2, n_resources=2, n_files=5)
+        self.co = CoscineOverview(file_name=file_name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_rollups(self):
+        rollup = self.co.get_rollup(0)
+        self.assertEqual(rollup["n_files"], len(self.co.files))
+        self.assertEqual(rollup["n_resources"], len(self.co.resources))
+        self.assertEqual(rollup["size"], sum(file["size"] for file in self.co.files))
+        self.assertEqual(sorted(rollup["schemes"]), ["Sample", "Scheme1"])
+        self.assertEqual(rollup["schemes"]["Sample"]["n_files"], 10)
+        self.assertEqual(self.co.get_rollup("Sample"), self.co.get_rollup("/Benchmark/Sample"))
+        self.assertEqual(
+            CoscineOverview._to_utc(rollup["last_modified"]),
+            max(CoscineOverview._to_utc(file["modified"]) for file in self.co.files),
+        )
+
+    def test_rank_projects(self):
+        self.assertEqual(
+            self.co.rank_projects(by="n_files"),
+            [("/Benchmark", 20), ("/Benchmark/Sample", 10), ("/Benchmark/Scheme1", 10)],
+        )
+        self.assertEqual(self.co.rank_projects(by="n_files", scheme="Scheme1", top=1), [("/Benchmark", 10)])
+        # Later as a string, but 30 minutes earlier in UTC than the Sample files.
+        for file in self.co.files:
+            if file["project"] == self.co._get_pr_idx("Sample"):
+                file["modified"] = "2029-12-31T23:30:00+00:00"
+            else:
+                file["modified"] = "2030-01-01T01:00:00+02:00"
+        self.co._compute_rollups()
+        ranking = self.co.rank_projects(by="last_modified")
+        self.assertEqual([path for path, _ in ranking[1:]], ["/Benchmark/Sample", "/Benchmark/Scheme1"])
+        self.assertEqual(CoscineOverview._to_utc(ranking[0][1]), CoscineOverview._to_utc("2029-12-31T23:30:00Z"))
+
+    def _assert_restored(self, rollups, download_time):
+        self.assertEqual(self.co._rollups, rollups)
+        self.assertEqual(self.co.get_rollup(0)["n_files"], 20)
+        self.assertEqual(self.co.download_time, download_time)
+
+    def test_cancelled_crawl_restores_rollups(self):
+        rollups, download_time = self.co._rollups, self.co.download_time
+        client = _BlockingClient()
+        self.co._client = client
+
+        async def crawl_and_cancel():
+            task = asyncio.ensure_future(self.co.download_from_coscine_async())
+            await asyncio.get_running_loop().run_in_executor(None, client.started.wait, 10)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        try:
+            asyncio.run(crawl_and_cancel())
+        finally:
+            client.release.set()
+        self._assert_restored(rollups, download_time)
+
+    def test_failed_crawl_restores_rollups(self):
+        rollups, download_time = self.co._rollups, self.co.download_time
+        self.co._client = _BlockingClient(error=ConnectionError("offline"))
+        with self.assertRaises(ConnectionError):
+            asyncio.run(self.co.download_from_coscine_async())
+        self._assert_restored(rollups, download_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import tempfile
+import unittest
+
+import coscine
+import pandas as pd
+
+from benchmarks.synthetic import load_overview, write_overview_hdf
+from utils.coscine_overview import CoscineOverview
+from utils.meta_data_worker import UploadError, WorkCoscineOverview
+
+
+class _FakeResource:
+    """Resource failing the uploads of the given file names with the given errors."""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.uploads = []
+
+    def MetadataForm(self):
+        return {}
+
+    def upload(self, name, f, form):
+        self.uploads.append(name)
+        if name in self.errors:
+            raise self.errors[name]
+
+
+class TestUploadFiles(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        file_name = os.path.join(self._tmp.name, "CoScInE_Overview")
+        write_overview_hdf(file_name, n_schemes=2, n_resources=1, n_files=2)
+        self.co = CoscineOverview(file_name=file_name)
+        self.co._client = object()
+        self.worker = WorkCoscineOverview(self.co)
+        self.resource = _FakeResource()
+        self.worker._get_coscine_resource = lambda pr_id, res_id: self.resource
+        self.files = []
+        for directory in ["a", "b"]:
+            os.makedirs(os.path.join(self._tmp.name, directory))
+            for name in ["x.csv", f"{directory}.csv"]:
+                self.files.append(os.path.join(self._tmp.name, directory, name))
+                with open(self.files[-1], "w") as f:
+                    f.write(name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _upload(self, files, **kwargs):
+        return self.worker.upload_files(0, files, lambda file_path: {"ID": os.path.basename(file_path)}, **kwargs)
+
+    def test_duplicate_file_names(self):
+        with self.assertRaisesRegex(ValueError, "Duplicate file name 'x.csv'"):
+            self._upload(self.files)
+        self.assertEqual(self.resource.uploads, [])
+
+    def test_partial_failure(self):
+        self.resource.errors = {"a.csv": KeyError("Unknown key")}
+        with self.assertRaises(UploadError) as context:
+            self._upload([self.files[1], self.files[2]], retry_delay=0)
+        self.assertEqual(list(context.exception.failed), [self.files[1]])
+        self.assertEqual([self.co.files[idx]["name"] for idx in context.exception.file_indices], ["x.csv"])
+        # Permanent errors are not retried.
+        self.assertEqual(sorted(self.resource.uploads), ["a.csv", "x.csv"])
+
+    def test_retry_transient_errors(self):
+        self.resource.errors = {"a.csv": coscine.CoscineException("Service unavailable")}
+        with self.assertRaises(UploadError):
+            self._upload([self.files[1]], retries=2, retry_delay=0)
+        self.assertEqual(self.resource.uploads, ["a.csv"] * 3)
+
+
+class TestMultiSchemeMetadata(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        file_name = os.path.join(cls._tmp.name, "CoScInE_Overview")
+        write_overview_hdf(file_name, n_schemes=2, n_resources=2, n_files=5)
+        co = load_overview(file_name)
+        # A field of Scheme1 not set in any file.
+        for res in co.resources:
+            if res["profile"].endswith("/Scheme1/"):
+                res["meta_data_fields"] = dict(res["meta_data_fields"], Operator={"required": False, "options": []})
+        cls.worker = WorkCoscineOverview(co)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def test_split_source_by_scheme(self):
+        resources = self.worker.resources
+        self.assertEqual(self.worker._split_source_by_scheme(None), {"Sample": "Sample", "Scheme1": "Scheme1"})
+        self.assertEqual(self.worker._split_source_by_scheme("Sample"), {"Sample": "Sample"})
+        self.assertEqual(
+            self.worker._split_source_by_scheme([0, resources[1], 2]),
+            {"Sample": [resources[0], resources[1]], "Scheme1": [resources[2]]},
+        )
+        self.assertEqual(self.worker._split_source_by_scheme(3), {"Scheme1": [resources[3]]})
+        with self.assertRaises(TypeError):
+            self.worker._split_source_by_scheme(3.0)
+
+    def test_not_combined(self):
+        tables = self.worker.get_metadata(None, multi_scheme=True, combine=False)
+        self.assertEqual(list(tables), ["Sample", "Scheme1"])
+        for scheme, df in tables.items():
+            pd.testing.assert_frame_equal(df, self.worker.get_metadata(scheme))
+
+    def test_combined(self):
+        df = self.worker.get_metadata(None, multi_scheme=True)
+        sample_df = self.worker.get_metadata("Sample")
+        scheme1_df = self.worker.get_metadata("Scheme1")
+        self.assertEqual(len(df), len(sample_df) + len(scheme1_df))
+        self.assertEqual(df.columns[0], ("scheme", ""))
+        self.assertEqual(list(df[("scheme", "")].cat.categories), ["Sample", "Scheme1"])
+        # The flat Scheme1 table is lifted to two levels.
+        self.assertEqual(df.columns.nlevels, 2)
+        scheme1_rows = df[df[("scheme", "")] == "Scheme1"].reset_index(drop=True)
+        for column in scheme1_df.columns:
+            self.assertEqual(list(scheme1_rows[(column, "")]), list(scheme1_df[column]))
+        # Fields without any value are added from the metadata fields, the parsed Sample comments are not.
+        self.assertTrue(df[("Operator", "")].isna().all())
+        self.assertTrue(df[df[("scheme", "")] == "Sample"][("Comments", "")].isna().all())
+        sample_only = self.worker.get_metadata(["Sample"], multi_scheme=True)
+        self.assertNotIn(("Comments", ""), sample_only.columns)
+        self.assertEqual(sample_only.shape[1], sample_df.shape[1] + 1)
+
+    def test_unparsed_sample_comments(self):
+        df = self.worker.get_metadata(["Sample"], multi_scheme=True, parse_sample_comments=False)
+        self.assertEqual(df.columns.nlevels, 1)
+        self.assertEqual(list(df.columns), ["scheme"] + list(self.worker.get_metadata("Sample", False).columns))
+
+    def test_mixed_sources_sparse(self):
+        resources = self.worker.resources
+        df = self.worker.get_metadata([0, resources[1], 2], multi_scheme=True, sparse=True)
+        self.assertEqual(list(df[("scheme", "")].value_counts(sort=False)), [10, 5])
+        # Scheme1 columns are missing in 10 of 15 rows, Sample columns only in 5.
+        self.assertIsInstance(df[("Method", "")].dtype, pd.SparseDtype)
+        self.assertNotIsInstance(df[("ID", "")].dtype, pd.SparseDtype)
+        dense = self.worker.get_metadata([0, resources[1], 2], multi_scheme=True)
+        self.assertEqual(list(df[("Method", "")].sparse.to_dense().fillna("")), list(dense[("Method", "")].fillna("")))
+
+
+if __name__ == "__main__":
+    unittest.main()
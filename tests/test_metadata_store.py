@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+import pandas as pd
+
+from benchmarks.synthetic import load_overview, write_overview_hdf
+from utils.meta_data_worker import WorkCoscineOverview
+from utils.metadata_store import MetadataStore
+
+
+class TestMetadataStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        file_name = os.path.join(cls._tmp.name, "CoScInE_Overview")
+        write_overview_hdf(file_name, n_schemes=2, n_resources=2, n_files=5)
+        cls.worker = WorkCoscineOverview(load_overview(file_name))
+        cls.sample_df = cls.worker.get_metadata("Sample")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def test_sample_round_trip(self):
+        for file_format in ["parquet", "arrow"]:
+            with self.subTest(file_format=file_format), tempfile.TemporaryDirectory() as path:
+                store = MetadataStore(path, file_format=file_format)
+                store.write("Sample", self.sample_df)
+                df = store.read("Sample")
+                pd.testing.assert_frame_equal(df, self.sample_df)
+                pd.testing.assert_frame_equal(self.worker.get_T_c(df), self.worker.get_T_c(self.sample_df))
+
+    def test_append(self):
+        for file_format in ["parquet", "arrow"]:
+            with self.subTest(file_format=file_format), tempfile.TemporaryDirectory() as path:
+                store = MetadataStore(path, file_format=file_format)
+                store.write("Sample", self.sample_df.iloc[:4])
+                self.assertEqual(store.write("Sample", self.sample_df, append=True), len(self.sample_df) - 4)
+                self.assertEqual(store.write("Sample", self.sample_df, append=True), 0)
+                # Columns first seen in appended rows are stored after the existing ones.
+                pd.testing.assert_frame_equal(store.read("Sample"), self.sample_df, check_like=True)
+
+    def test_failed_write_keeps_stored_table(self):
+        bad_df = self.sample_df.copy()
+        # Not convertible to Arrow nor JSON, in a row not stored yet.
+        bad_df[("ID", "")] = list(bad_df[("ID", "")].iloc[:-1]) + [object()]
+        for append in [False, True]:
+            with self.subTest(append=append), tempfile.TemporaryDirectory() as path:
+                store = MetadataStore(path)
+                store.write("Sample", self.sample_df.iloc[:4])
+                with self.assertRaises(TypeError):
+                    store.write("Sample", bad_df, append=append)
+                pd.testing.assert_frame_equal(store.read("Sample"), self.sample_df.iloc[:4])
+                self.assertEqual(os.listdir(os.path.join(path, "scheme=Sample")), ["part-00000.parquet"])
+
+    def test_flat_scheme_round_trip(self):
+        df = self.worker.get_metadata("Scheme1")
+        with tempfile.TemporaryDirectory() as path:
+            store = MetadataStore(path)
+            store.write("Scheme1", df)
+            self.assertEqual(store.schemes, ["Scheme1"])
+            pd.testing.assert_frame_equal(store.read("Scheme1"), df)
+
+    def test_read_from_store(self):
+        with tempfile.TemporaryDirectory() as path:
+            self.worker.export_metadata(path, file_format="arrow")
+            worker = WorkCoscineOverview(self.worker._coscine_overview, metadata_store=path)
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                pd.testing.assert_frame_equal(worker.get_metadata("Sample", from_store=True), self.sample_df)
+            # A store built from another crawl is ignored.
+            worker._metadata_store.download_time = "2000-01-01T00:00:00"
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                pd.testing.assert_frame_equal(worker.get_metadata("Sample", from_store=True), self.sample_df)
+            self.assertEqual(len(caught), 1)
+
+    def test_appended_store_not_used(self):
+        with tempfile.TemporaryDirectory() as path:
+            store = self.worker.export_metadata(path, schemes=["Sample"])
+            self.assertIsNone(store.download_time)
+            store = self.worker.export_metadata(path)
+            self.assertEqual(store.download_time, self.worker._coscine_overview.download_time.isoformat())
+            store = self.worker.export_metadata(path, append=True)
+            self.assertIsNone(store.download_time)
+            worker = WorkCoscineOverview(self.worker._coscine_overview, metadata_store=store)
+            with self.assertWarns(UserWarning):
+                pd.testing.assert_frame_equal(worker.get_metadata("Sample", from_store=True), self.sample_df)
+
+
+if __name__ == "__main__":
+    unittest.main()
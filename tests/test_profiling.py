@@ -0,0 +1,25 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.profiling import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_threaded_stages(self):
+        profiler = Profiler()
+
+        @profiler.profiled(name="stage")
+        def stage():
+            return [0] * 10
+
+        profiler.enable()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: stage(), range(1000)))
+        profiler.disable()
+        self.assertEqual(profiler.stats["stage"]["calls"], 1000)
+        self.assertIsNone(profiler.stats["stage"]["memory"])
+        self.assertIn("net blocks", profiler.report())
+
+
+if __name__ == "__main__":
+    unittest.main()
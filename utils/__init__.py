@@ -1,3 +1,5 @@
 from utils.coscine_overview import CoscineOverview
-from utils.meta_data_worker import WorkCoscineOverview
+from utils.meta_data_worker import UploadError, WorkCoscineOverview
 from utils.dataexplorer import DataExplorer
+from utils.metadata_store import MetadataStore
+from utils.overview_service import OverviewCrawler
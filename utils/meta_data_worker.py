@@ -1,19 +1,51 @@
 import re
 import os
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 
+import coscine
 import numpy as np
 import pandas as pd
+import requests
 from datetime import datetime
 from utils.coscine_overview import CoscineOverview
+from utils.metadata_store import MetadataStore
+from utils.profiling import profiler
 from utils.utils import Compound
 
 from pyiron_contrib.generic.coscine import CoscineFileData, CoscinePrWrapper
 
+# Errors after which an upload is retried, others like a missing file or an invalid form value fail right away.
+_TRANSIENT_UPLOAD_ERRORS = (coscine.CoscineException, requests.ConnectionError, requests.Timeout)
+
+
+class UploadError(RuntimeError):
+    """Raised by WorkCoscineOverview.upload_files if some uploads failed.
+
+    Attributes:
+        file_indices(list): Indices in WorkCoscineOverview.files of the files uploaded successfully.
+        failed(dict): Local file path to exception of each failed upload.
+    """
+
+    def __init__(self, msg, file_indices, failed):
+        super().__init__(msg)
+        self.file_indices = file_indices
+        self.failed = failed
+
 
 class WorkCoscineOverview:
-    def __init__(self, coscine_overview: CoscineOverview):
+    def __init__(self, coscine_overview: CoscineOverview, metadata_store=None):
+        """
+        Args:
+            coscine_overview(CoscineOverview): The overview to work on.
+            metadata_store(MetadataStore/str): Optional store (or its directory) with precomputed scheme tables, e.g.
+                                               written by an OverviewCrawler, see get_metadata(from_store=True).
+        """
         self._coscine_overview = coscine_overview
+        if isinstance(metadata_store, str):
+            metadata_store = MetadataStore(metadata_store, file_format="arrow")
+        self._metadata_store = metadata_store
         self._schemes = {}
         self._metadata_keys_of_schemes = {}
         self.debug = False
@@ -21,12 +53,26 @@ class WorkCoscineOverview:
 
         self._sort_res_into_schemes()
 
+    def refresh(self):
+        """Reload the underlying overview if its file changed, see CoscineOverview.refresh.
+
+        Returns:
+            bool: True if new data was loaded.
+        """
+        if not self._coscine_overview.refresh():
+            return False
+        self._schemes = {}
+        self._metadata_keys_of_schemes = {}
+        self._sort_res_into_schemes()
+        return True
+
     @property
     def browser(self):
         if self.client is not None:
             self._c_pr = self.client
         return CoscinePrWrapper(self._c_pr)
 
+    @profiler.profiled()
     def _sort_res_into_schemes(self):
         meta_data_fields_not_stored = []
         for idx, res in enumerate(self.resources):
@@ -84,17 +130,183 @@ class WorkCoscineOverview:
             print(
                 f"DEBUG get file handle:\n   pr_id={pr_id}\n   res_id={res_id}\n   file_name={file_name}"
             )
-        pr = self.client.projects(toplevel=False, id=pr_id)[0]
-        res = pr.resources(id=res_id)[0]
+        res = self._get_coscine_resource(pr_id, res_id)
         obj = res.objects(Name=file_name)
         return CoscineFileData(obj[0])
 
+    def _get_coscine_resource(self, pr_id, res_id):
+        pr = self.client.projects(toplevel=False, id=pr_id)[0]
+        return pr.resources(id=res_id)[0]
+
+    def _get_res_idx(self, resource):
+        if isinstance(resource, int):
+            return resource
+        elif isinstance(resource, dict):
+            for idx, res in enumerate(self.resources):
+                if res["id"] == resource["id"]:
+                    return idx
+            raise ValueError(f"Resource {resource['path']} is not part of the overview.")
+        elif isinstance(resource, str):
+            matches = [idx for idx, res in enumerate(self.resources) if resource in (res["path"], res["name"])]
+            if len(matches) != 1:
+                raise ValueError(f"Expected exactly one resource named '{resource}' but found {len(matches)}.")
+            return matches[0]
+        else:
+            raise TypeError(f"Unknown type {type(resource)}.")
+
+    def validate_metadata(self, resource, metadata):
+        """Check metadata against the cached metadata fields of a resource without contacting CoScInE.
+
+        Args:
+            resource(int/dict/str): The resource as index in self.resources, resource dict or its name/path.
+            metadata(dict): The metadata to check.
+
+        Returns:
+            list: Human-readable descriptions of all problems found; empty if the metadata is valid.
+        """
+        res_dict = self.resources[self._get_res_idx(resource)]
+        fields = res_dict.get("meta_data_fields", {})
+        if len(fields) == 0:
+            raise ValueError(
+                f"Metadata fields of resource {res_dict['path']} not cached, run refetch_failed() on the "
+                f"CoscineOverview."
+            )
+        if not isinstance(fields, dict):
+            fields = {key: {"required": False, "options": []} for key in fields}
+        problems = []
+        for key in metadata:
+            if key not in fields:
+                problems.append(f"Unknown key '{key}'.")
+        for key, field in fields.items():
+            value = metadata.get(key)
+            if value is None or value == "" or value == []:
+                if field["required"]:
+                    problems.append(f"Required key '{key}' is missing.")
+                continue
+            if len(field["options"]) > 0:
+                values = value if isinstance(value, list) else [value]
+                for v in values:
+                    if v not in field["options"]:
+                        problems.append(f"Value '{v}' for key '{key}' is not one of {field['options']}.")
+        return problems
+
+    def upload_files(self, resource, files, form_template, retries=3, retry_delay=1.0):
+        """Upload several local files concurrently to one resource and add them to the overview.
+
+        All metadata is validated against the cached metadata fields of the resource before the first upload. Files
+        are stored under their base name, thus the base names have to be unique.
+
+        Args:
+            resource(int/dict/str): The resource as index in self.resources, resource dict or its name/path.
+            files(list): Paths of the local files to upload.
+            form_template(callable): Called as form_template(file_path) and returning the metadata dict for this file.
+            retries(int): Number of additional attempts per file after a failed upload due to a CoScInE, connection
+                          or timeout error.
+            retry_delay(float): Seconds to wait before the first retry, doubled for each further retry.
+
+        Returns:
+            list: Indices of the new entries in self.files.
+
+        Raises:
+            UploadError: If some uploads failed; the files uploaded successfully are added to the overview anyway and
+                         their indices are available as UploadError.file_indices.
+        """
+        self._coscine_overview._check_writable()
+        if self.client is None:
+            raise RuntimeError(
+                "No coscine_client available! specify client=coscine.Client or client=TOKEN"
+            )
+        res_idx = self._get_res_idx(resource)
+        forms = [form_template(file_path) for file_path in files]
+        problems = {}
+        file_names = [os.path.basename(file_path) for file_path in files]
+        for file_path, file_name, form in zip(files, file_names, forms):
+            file_problems = self.validate_metadata(res_idx, form)
+            if file_names.count(file_name) > 1:
+                file_problems.append(f"Duplicate file name '{file_name}'.")
+            if len(file_problems) > 0:
+                problems[file_path] = file_problems
+        if len(problems) > 0:
+            msg = "\n".join(f"{file_path}: {' '.join(p)}" for file_path, p in problems.items())
+            raise ValueError(f"Invalid files or metadata, nothing uploaded:\n{msg}")
+
+        res_dict = self.resources[res_idx]
+        res = self._get_coscine_resource(self.projects[res_dict["project"]]["id"], res_dict["id"])
+
+        def _upload(file_path, metadata):
+            for attempt in range(retries + 1):
+                try:
+                    form = res.MetadataForm()
+                    for key, value in metadata.items():
+                        form[key] = value
+                    with open(file_path, "rb") as f:
+                        res.upload(os.path.basename(file_path), f, form)
+                    return
+                except _TRANSIENT_UPLOAD_ERRORS:
+                    if attempt == retries:
+                        raise
+                    time.sleep(retry_delay * 2**attempt)
+
+        executor = self._coscine_overview._get_executor()
+        futures = [executor.submit(_upload, file_path, form) for file_path, form in zip(files, forms)]
+        result = []
+        failed = {}
+        for file_path, form, future in zip(files, forms, futures):
+            try:
+                future.result()
+            except Exception as e:
+                failed[file_path] = e
+                continue
+            result.append(
+                self._coscine_overview._add_file_entry_to_res(
+                    os.path.basename(file_path), os.path.getsize(file_path), form, res_idx
+                )
+            )
+        self._coscine_overview._compute_rollups()
+        self._coscine_overview.to_hdf()
+        if len(failed) > 0:
+            msg = "\n".join(f"{file_path}: {e.__class__.__name__}('{e}')" for file_path, e in failed.items())
+            raise UploadError(f"{len(failed)} of {len(files)} uploads failed:\n{msg}", result, failed)
+        return result
+
     def get_file_content(self, file):
         return self.get_file_handle(file).content()
 
+    async def get_file_handle_async(self, file=None, pr_id=None, res_id=None, file_name=None):
+        """Awaitable counterpart of get_file_handle, resolved on the shared thread pool of the CoscineOverview."""
+        return await self._coscine_overview._run_async(
+            self.get_file_handle, file=file, pr_id=pr_id, res_id=res_id, file_name=file_name
+        )
+
+    async def get_file_content_async(self, file):
+        """Awaitable counterpart of get_file_content."""
+        return await self._coscine_overview._run_async(self.get_file_content, file)
+
+    async def get_file_contents_async(self, files, progress=None):
+        """Download the content of several files concurrently.
+
+        Args:
+            files(list): Files as accepted by get_file_handle (file indices, file dicts or single row DataFrames).
+            progress(callable): Called as progress(done, total) after each finished download.
+
+        Returns:
+            list: The file contents in the order of files.
+        """
+        done = 0
+
+        async def _get_content(file):
+            nonlocal done
+            content = await self.get_file_content_async(file)
+            done += 1
+            if progress is not None:
+                progress(done, len(files))
+            return content
+
+        return await self._coscine_overview._gather(_get_content(file) for file in files)
+
     @staticmethod
     def _get_profile(resource):
-        return resource["profile"].split("/")[-2]
+        return CoscineOverview._get_profile(resource)
 
     @property
     def client(self):
@@ -146,6 +358,7 @@ class WorkCoscineOverview:
             result.append(self.files[file_idx])
         return result
 
+    @profiler.profiled()
     def get_file_idx(self, source):
         """Receive list of file indices for source
 
@@ -176,6 +389,7 @@ class WorkCoscineOverview:
 
         return files
 
+    @profiler.profiled()
     def _get_metadata(self, source):
         result = []
         file_idx_list = self.get_file_idx(source)
@@ -205,7 +419,40 @@ class WorkCoscineOverview:
 
         return profile_name, pd.DataFrame(result)
 
-    def get_metadata(self, source, parse_sample_comments=True):
+    def get_metadata(
+        self, source, parse_sample_comments=True, multi_scheme=False, combine=True, sparse=False, from_store=False
+    ):
+        """Collect the metadata of all files of source in a DataFrame.
+
+        Args:
+            source(str/list/resource/int): Source of the files to consider, see get_file_idx. With multi_scheme, also a
+                                           list of scheme names or None for all schemes.
+            parse_sample_comments(bool): Parse the comments of the 'Sample' scheme into separate columns.
+            multi_scheme(bool): Allow a source spanning several schemes. The table of each scheme is built in
+                                parallel and the columns are unified using the stored metadata fields of all schemes.
+            combine(bool): With multi_scheme, return one DataFrame with a categorical 'scheme' column instead of a
+                           dict of scheme name to DataFrame.
+            sparse(bool): With multi_scheme and combine, store columns missing in more than half of the rows as
+                          sparse columns.
+            from_store(bool): Read the tables of whole schemes from the attached metadata store instead of building
+                              them. The store is only used if it was built from the currently loaded overview
+                              (same download_time), otherwise the tables are built locally. Stores written with
+                              export_metadata(append=True) are never used, as they may keep rows of deleted or
+                              changed files.
+        """
+        if multi_scheme:
+            return self._get_multi_scheme_metadata(
+                source, parse_sample_comments=parse_sample_comments, combine=combine, sparse=sparse,
+                from_store=from_store,
+            )
+        if (
+            from_store
+            and parse_sample_comments
+            and isinstance(source, str)
+            and self._store_is_current()
+            and source in self._metadata_store.schemes
+        ):
+            return self._metadata_store.read(source)
         profile_name, df = self._get_metadata(source)
         if profile_name is None:
             warnings.warn(f"Source {source} does not contain files!")
@@ -215,6 +462,116 @@ class WorkCoscineOverview:
         else:
             return pd.DataFrame(df)
 
+    def _store_is_current(self):
+        if self._metadata_store is None:
+            return False
+        download_time = self._coscine_overview.download_time
+        if download_time is None or self._metadata_store.download_time != download_time.isoformat():
+            warnings.warn("Metadata store does not match the loaded overview, building the tables locally.")
+            return False
+        return True
+
+    def _split_source_by_scheme(self, source):
+        if source is None:
+            return {scheme: scheme for scheme in self.scheme_list}
+        elif isinstance(source, str):
+            return {source: source}
+        elif isinstance(source, list) and all(isinstance(scheme, str) for scheme in source):
+            return {scheme: scheme for scheme in source}
+        elif isinstance(source, (dict, int)):
+            source = [source]
+        elif not isinstance(source, list):
+            raise TypeError(source)
+        result = {}
+        for res in source:
+            if isinstance(res, int):
+                res = self.resources[res]
+            result.setdefault(self._get_profile(res), []).append(res)
+        return result
+
+    def _get_multi_scheme_metadata(
+        self, source, parse_sample_comments=True, combine=True, sparse=False, from_store=False
+    ):
+        # A pool of its own, blocking on tasks of the shared pool could deadlock when called from within one of its
+        # threads.
+        sources = self._split_source_by_scheme(source)
+        with ThreadPoolExecutor(max_workers=max(1, min(len(sources), self._coscine_overview.max_workers))) as executor:
+            futures = {
+                scheme: executor.submit(
+                    self.get_metadata, scheme_source, parse_sample_comments=parse_sample_comments,
+                    from_store=from_store,
+                )
+                for scheme, scheme_source in sources.items()
+            }
+            tables = {scheme: future.result() for scheme, future in futures.items()}
+        tables = {scheme: df for scheme, df in tables.items() if df is not None}
+        if not combine:
+            return tables
+        if len(tables) == 0:
+            return None
+
+        two_levels = any(df.columns.nlevels > 1 for df in tables.values())
+        scheme_column = ("scheme", "") if two_levels else "scheme"
+        columns = []
+        for scheme, df in tables.items():
+            if two_levels and df.columns.nlevels == 1:
+                tables[scheme] = df = df.set_axis(pd.MultiIndex.from_tuples([(key, "") for key in df.columns]), axis=1)
+            for column in df.columns:
+                if column not in columns:
+                    columns.append(column)
+        for scheme in tables:
+            for key in self._metadata_keys_of_schemes.get(scheme, []):
+                if scheme == "Sample" and parse_sample_comments and key == "Comments":
+                    # Parsed into separate columns by extend_sample_comments.
+                    continue
+                column = (key, "") if two_levels else key
+                if column not in columns:
+                    columns.append(column)
+
+        # Columns missing in some tables are filled by concat, such that their dtype only depends on the present values.
+        result = pd.concat(list(tables.values()), ignore_index=True).reindex(columns=columns)
+        result.insert(
+            0,
+            scheme_column,
+            pd.Categorical(np.repeat(list(tables), [len(df) for df in tables.values()]), categories=list(tables)),
+        )
+        result = result.infer_objects()
+        if sparse:
+            for column in columns:
+                sparse_dtype = pd.SparseDtype(result[column].dtype)
+                if pd.isna(sparse_dtype.fill_value) and result[column].isna().mean() > 0.5:
+                    result[column] = result[column].astype(sparse_dtype)
+        return result
+
+    def export_metadata(self, path, schemes=None, file_format="parquet", append=False, parse_sample_comments=True):
+        """Write the metadata table of each scheme to a MetadataStore readable without the CoScInE stack.
+
+        Args:
+            path(str): Directory of the store.
+            schemes(list): Names of the schemes to export, defaults to all schemes.
+            file_format(str): 'parquet' or 'arrow' (Arrow IPC).
+            append(bool): Only add files not yet stored, e.g. after an update of the overview. Rows of deleted or
+                          changed files are kept, thus the store is no longer marked as built from the loaded overview,
+                          see get_metadata(from_store=True).
+            parse_sample_comments(bool): Passed to get_metadata.
+
+        Returns:
+            MetadataStore: The store written to.
+        """
+        store = MetadataStore(path, file_format=file_format)
+        download_time = self._coscine_overview.download_time.isoformat()
+        stored_download_time = store.download_time
+        # Unmark the store while it is written, such that an interrupted export is not used either.
+        store.download_time = None
+        for scheme in schemes or self.scheme_list:
+            df = self.get_metadata(scheme, parse_sample_comments=parse_sample_comments)
+            if df is not None:
+                store.write(scheme, df, append=append)
+        # Schemes not written now are only up to date if they were exported from the same overview.
+        if not append and (schemes is None or stored_download_time == download_time):
+            store.download_time = download_time
+        return store
+
     @staticmethod
     def _sample_comment_parser(sample_comment: str):
         comment_lines = sample_comment.split("\n")[2:]
@@ -271,6 +628,7 @@ class WorkCoscineOverview:
                 comments.append({("Comments", ""): row.Comments})
         return comments
 
+    @profiler.profiled()
     def extend_sample_comments(self, sample_df: pd.DataFrame):
         _sample_df = sample_df.copy()
         parsed_df = pd.DataFrame(self._sample_parser(_sample_df))
@@ -294,6 +652,7 @@ class WorkCoscineOverview:
             ).group()
         return result
 
+    @profiler.profiled()
     def get_T_c(
         self,
         sample_df: pd.DataFrame,
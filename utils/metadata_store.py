@@ -0,0 +1,275 @@
+import glob
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+
+class MetadataStore:
+    """Directory of per-scheme metadata tables stored as partitioned Parquet or Arrow IPC files.
+
+    Each scheme lives in a hive-style partition 'scheme=<name>' holding one file per write. The schemes have different
+    columns, thus read each partition on its own, e.g. with read or, without the CoScInE stack, with
+    pd.read_parquet(os.path.join(path, "scheme=Sample")); reading the whole directory at once drops the columns not
+    present in the first file.
+
+    read restores the stored DataFrame: Two-level (MultiIndex) columns, as produced by
+    WorkCoscineOverview.extend_sample_comments, are stored as flat names joined by LEVEL_SEPARATOR. Object columns
+    holding only strings or only floats are stored as string or float64 columns; object columns of mixed types, e.g.
+    'base' next to concentrations, are stored as JSON strings. Both are marked in the field metadata (pandas_encoding)
+    and converted back to object columns with NaN for missing values. Other readers see the JSON strings as they are.
+    """
+
+    LEVEL_SEPARATOR = " :: "
+    _suffixes = {"parquet": ".parquet", "arrow": ".arrow"}
+    _key_columns = ["pr_id", "res_id", "file name"]
+
+    def __init__(self, path, file_format="parquet"):
+        if file_format not in self._suffixes:
+            raise ValueError(f"Unknown file format '{file_format}'. Choose one of {list(self._suffixes)}.")
+        self._path = path
+        self._file_format = file_format
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def file_format(self):
+        return self._file_format
+
+    @property
+    def download_time(self):
+        """ISO timestamp of the download of the overview the tables were built from, None if unknown."""
+        try:
+            with open(os.path.join(self._path, "store_info.json")) as f:
+                return json.load(f)["download_time"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @download_time.setter
+    def download_time(self, download_time):
+        if isinstance(download_time, datetime):
+            download_time = download_time.isoformat()
+        os.makedirs(self._path, exist_ok=True)
+        with open(os.path.join(self._path, "store_info.json"), "w") as f:
+            json.dump({"download_time": download_time}, f)
+
+    @property
+    def schemes(self):
+        if not os.path.isdir(self._path):
+            return []
+        schemes = [name[len("scheme="):] for name in os.listdir(self._path) if name.startswith("scheme=")]
+        return sorted(scheme for scheme in schemes if len(self._get_parts(scheme)) > 0)
+
+    def _get_scheme_dir(self, scheme):
+        return os.path.join(self._path, f"scheme={scheme}")
+
+    def _get_parts(self, scheme):
+        pattern = os.path.join(self._get_scheme_dir(scheme), "part-*" + self._suffixes[self._file_format])
+        return sorted(glob.glob(pattern))
+
+    def _get_part(self, scheme, part_no):
+        return os.path.join(self._get_scheme_dir(scheme), f"part-{part_no:05d}{self._suffixes[self._file_format]}")
+
+    def write(self, scheme, df: pd.DataFrame, append=False):
+        """Store the metadata table of one scheme.
+
+        Args:
+            scheme(str): Name of the scheme.
+            df(pandas.DataFrame): Table as returned by WorkCoscineOverview.get_metadata.
+            append(bool): Only write rows of files not yet stored as an additional part file. Rows already stored are
+                          kept unchanged. If a column of the new rows needs another storage type than the stored
+                          column, e.g. a float column now also holding 'base', all rows are rewritten. Otherwise, all
+                          stored parts of this scheme are replaced.
+
+        Returns:
+            int: Number of rows written.
+        """
+        parts = self._get_parts(scheme)
+        if append and len(parts) > 0:
+            existing = self.read_table(scheme)
+            existing_df = self._to_pandas(existing)
+            known_keys = set(self._get_row_keys(existing_df))
+            df = df[[key not in known_keys for key in self._get_row_keys(df)]]
+            if len(df) == 0:
+                return 0
+            encodings = {field.name: self._get_encoding(field) for field in existing.schema}
+            try:
+                table = self._align_to_schema(self._to_table(df, encodings=encodings), existing.schema)
+            except ValueError:
+                self.write(scheme, pd.concat([existing_df, df], ignore_index=True))
+                return len(df)
+            part = self._get_part(scheme, len(parts))
+            parts = []
+        else:
+            table = self._to_table(df)
+            part = self._get_part(scheme, 0)
+        # Write to a temporary file first, such that the stored parts are only replaced once the new one is complete.
+        os.makedirs(self._get_scheme_dir(scheme), exist_ok=True)
+        tmp_part = os.path.join(self._get_scheme_dir(scheme), f"tmp-{os.getpid()}-{os.path.basename(part)}")
+        try:
+            self._write_table(table, tmp_part)
+        except BaseException:
+            if os.path.exists(tmp_part):
+                os.remove(tmp_part)
+            raise
+        for old_part in parts:
+            if old_part != part:
+                os.remove(old_part)
+        os.replace(tmp_part, part)
+        return len(df)
+
+    def read_table(self, scheme, memory_map=True):
+        """Read the stored table of one scheme as pyarrow.Table; memory mapped files are not copied into memory."""
+        parts = self._get_parts(scheme)
+        if len(parts) == 0:
+            raise ValueError(f"No scheme '{scheme}' stored. Choose one of {self.schemes}.")
+        tables = [self._read_part(part, memory_map=memory_map) for part in parts]
+        if len(tables) == 1:
+            return tables[0]
+        try:
+            return pa.concat_tables(tables, promote_options="default")
+        except TypeError:
+            # pyarrow < 14
+            return pa.concat_tables(tables, promote=True)
+
+    def read(self, scheme, memory_map=True):
+        """Read the stored table of one scheme as pandas.DataFrame."""
+        return self._to_pandas(self.read_table(scheme, memory_map=memory_map))
+
+    def _read_part(self, part, memory_map):
+        if self._file_format == "parquet":
+            return pq.read_table(part, memory_map=memory_map)
+        source = pa.memory_map(part) if memory_map else pa.OSFile(part)
+        return pa.ipc.open_file(source).read_all()
+
+    def _write_table(self, table: pa.Table, part):
+        if self._file_format == "parquet":
+            pq.write_table(table, part)
+        else:
+            with pa.OSFile(part, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    def _to_table(self, df: pd.DataFrame, encodings=None):
+        fields = []
+        arrays = []
+        for idx in range(df.shape[1]):
+            column = df.columns[idx]
+            if isinstance(column, tuple):
+                name = self.LEVEL_SEPARATOR.join(level for level in column if level != "")
+            else:
+                name = column
+            force_json = encodings is not None and encodings.get(name) == "json"
+            array, encoding = self._to_array(df.iloc[:, idx], force_json=force_json)
+            metadata = None if encoding is None else {"pandas_encoding": encoding}
+            fields.append(pa.field(name, array.type, metadata=metadata))
+            arrays.append(array)
+        return pa.Table.from_arrays(
+            arrays, schema=pa.schema(fields, metadata={"column_levels": str(df.columns.nlevels)})
+        )
+
+    @staticmethod
+    def _is_missing(value):
+        return isinstance(value, float) and np.isnan(value)
+
+    def _to_array(self, series: pd.Series, force_json=False):
+        if series.dtype != object:
+            return pa.array(series, from_pandas=True), None
+        values = list(series)
+        present = [value for value in values if not self._is_missing(value)]
+        if not force_json:
+            if all(isinstance(value, str) for value in present):
+                return pa.array([None if self._is_missing(v) else v for v in values], type=pa.string()), "object"
+            if all(isinstance(value, float) for value in present):
+                return pa.array([None if self._is_missing(v) else v for v in values], type=pa.float64()), "object"
+        return (
+            pa.array(
+                [None if self._is_missing(v) else json.dumps(v, default=self._json_default) for v in values],
+                type=pa.string(),
+            ),
+            "json",
+        )
+
+    @staticmethod
+    def _json_default(value):
+        if value is pd.NaT:
+            return {"__nat__": True}
+        if isinstance(value, datetime):
+            return {"__datetime__": value.isoformat()}
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Value {value!r} of type {type(value)} cannot be stored.")
+
+    @staticmethod
+    def _json_object_hook(obj):
+        if "__nat__" in obj:
+            return pd.NaT
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        return obj
+
+    @staticmethod
+    def _get_encoding(field: pa.Field):
+        encoding = (field.metadata or {}).get(b"pandas_encoding")
+        return None if encoding is None else encoding.decode()
+
+    def _align_to_schema(self, table: pa.Table, schema: pa.Schema):
+        for idx, field in enumerate(table.schema):
+            if field.name not in schema.names:
+                continue
+            if self._get_encoding(field) != self._get_encoding(schema.field(field.name)):
+                raise ValueError(f"Column '{field.name}' is stored with another encoding.")
+            if schema.field(field.name).type == field.type:
+                continue
+            target_type = schema.field(field.name).type
+            try:
+                table = table.set_column(
+                    idx, field.with_type(target_type), table.column(idx).cast(target_type)
+                )
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(
+                    f"Column '{field.name}' of type {field.type} does not match the stored type {target_type}."
+                ) from e
+        return table
+
+    def _to_pandas(self, table: pa.Table):
+        columns = {}
+        for idx, (field, column) in enumerate(zip(table.schema, table.columns)):
+            encoding = self._get_encoding(field)
+            if encoding == "json":
+                columns[idx] = pd.Series(
+                    [
+                        np.nan if value is None else json.loads(value, object_hook=self._json_object_hook)
+                        for value in column.to_pylist()
+                    ],
+                    dtype=object,
+                )
+            elif encoding == "object":
+                columns[idx] = pd.Series(
+                    [np.nan if value is None else value for value in column.to_pylist()], dtype=object
+                )
+            else:
+                columns[idx] = column.to_pandas()
+        df = pd.DataFrame(columns, index=pd.RangeIndex(table.num_rows))
+        names = table.schema.names
+        metadata = table.schema.metadata or {}
+        if int(metadata.get(b"column_levels", b"1")) > 1:
+            df.columns = pd.MultiIndex.from_tuples(
+                [
+                    tuple(name.split(self.LEVEL_SEPARATOR, 1)) if self.LEVEL_SEPARATOR in name else (name, "")
+                    for name in names
+                ]
+            )
+        else:
+            df.columns = names
+        return df
+
+    def _get_row_keys(self, df: pd.DataFrame):
+        columns = [key if df.columns.nlevels == 1 else (key, "") for key in self._key_columns]
+        return list(zip(*[df[column] for column in columns]))
@@ -0,0 +1,107 @@
+"""Crawler keeping a shared CoScInE overview up to date for several notebook kernels.
+
+One crawler process owns the overview file and, optionally, a MetadataStore of Arrow IPC scheme tables. Kernels attach
+read-only and pick up new crawls with refresh:
+
+    co = CoscineOverview(file_name="/shared/CoScInE_Overview", read_only=True)
+    worker = WorkCoscineOverview(co, metadata_store="/shared/metadata")
+    worker.refresh()
+    sample_df = worker.get_metadata("Sample", from_store=True)
+
+Run the crawler with the token in the environment variable COSCINE_TOKEN, e.g.:
+
+    python -m utils.overview_service --file /shared/CoScInE_Overview --metadata-store /shared/metadata
+"""
+import argparse
+import os
+import shutil
+import time
+import traceback
+
+from utils.coscine_overview import CoscineOverview
+from utils.meta_data_worker import WorkCoscineOverview
+
+TOKEN_ENV = "COSCINE_TOKEN"
+
+
+class OverviewCrawler:
+    def __init__(self, file_name, token=None, metadata_store=None, interval=3600, verbose_level=0):
+        """
+        Args:
+            file_name(str): Shared HDF file read by the clients.
+            token(str/coscine.Client): Token or client to access CoScInE, defaults to the environment variable
+                                       COSCINE_TOKEN.
+            metadata_store(str): Optional directory to publish the scheme tables to as Arrow IPC files.
+            interval(float): Seconds between two crawls in run_forever.
+            verbose_level(int): Verbosity of the crawl.
+        """
+        self._file_name = file_name if file_name.endswith(".h5") else file_name + ".h5"
+        self._metadata_store = metadata_store
+        self.interval = interval
+        # Crawls are written to a private file, which then replaces the shared one, such that clients never see a
+        # partially written overview.
+        self._overview = CoscineOverview(
+            token=token if token is not None else os.environ[TOKEN_ENV],
+            verbose_level=verbose_level,
+            file_name=self._file_name[: -len(".h5")] + "_crawl",
+        )
+
+    @property
+    def overview(self):
+        return self._overview
+
+    def update(self):
+        """Crawl CoScInE, retry failed entries once and publish the result."""
+        self._overview.download_from_coscine()
+        if len(self._overview.error_ledger) > 0:
+            self._overview.refetch_failed()
+        self._publish()
+
+    def _publish(self):
+        # Build the new store before publishing anything, such that a failing export leaves the old overview and
+        # store in place. Clients only use a store carrying the download_time of their loaded overview.
+        if self._metadata_store is not None:
+            new_store = self._metadata_store + ".new"
+            old_store = self._metadata_store + ".old"
+            for path in (new_store, old_store):
+                shutil.rmtree(path, ignore_errors=True)
+            WorkCoscineOverview(self._overview).export_metadata(new_store, file_format="arrow")
+        os.replace(self._overview.file_name, self._file_name)
+        if self._metadata_store is None:
+            return
+        if os.path.exists(self._metadata_store):
+            os.replace(self._metadata_store, old_store)
+        os.replace(new_store, self._metadata_store)
+        # Clients still memory mapping the old tables keep them until they are closed.
+        shutil.rmtree(old_store, ignore_errors=True)
+
+    def run_forever(self):
+        while True:
+            start = time.time()
+            try:
+                self.update()
+            except Exception:
+                traceback.print_exc()
+            time.sleep(max(0.0, self.interval - (time.time() - start)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", required=True, help="shared overview file read by the clients")
+    parser.add_argument("--metadata-store", default=None, help="directory to publish the scheme tables to")
+    parser.add_argument("--interval", type=float, default=3600, help="seconds between two crawls")
+    parser.add_argument("--once", action="store_true", help="crawl once and exit")
+    parser.add_argument("--verbose", type=int, default=0, help="verbose level of the crawl")
+    args = parser.parse_args(argv)
+
+    crawler = OverviewCrawler(
+        args.file, metadata_store=args.metadata_store, interval=args.interval, verbose_level=args.verbose
+    )
+    if args.once:
+        crawler.update()
+    else:
+        crawler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import contextlib
+import functools
+import sys
+import threading
+import time
+import tracemalloc
+
+
+class Profiler:
+    """Opt-in collection of per-stage wall times and allocations.
+
+    Functions decorated with profiled only pay for one attribute lookup while the profiler is disabled. Once enabled,
+    each stage records its number of calls, the accumulated wall time and the net change of allocated memory blocks
+    (blocks still allocated minus blocks freed, thus possibly negative, not a count of allocations); with
+    enable(trace_memory=True) also the net change of traced memory in bytes. Nested stages are included in the numbers
+    of their parent. Stages may run on several threads, but the block and memory changes are process-wide and thus
+    include the allocations of all threads running meanwhile.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._started_tracing = False
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def enable(self, trace_memory=False):
+        self.enabled = True
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def disable(self):
+        self.enabled = False
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        tracing = tracemalloc.is_tracing()
+        memory = tracemalloc.get_traced_memory()[0] if tracing else 0
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            net_blocks = sys.getallocatedblocks() - blocks
+            net_memory = tracemalloc.get_traced_memory()[0] - memory if tracing else None
+            with self._lock:
+                stats = self._stats.setdefault(name, {"calls": 0, "time": 0.0, "net_blocks": 0, "memory": None})
+                stats["calls"] += 1
+                stats["time"] += elapsed
+                stats["net_blocks"] += net_blocks
+                if net_memory is not None:
+                    stats["memory"] = (stats["memory"] or 0) + net_memory
+
+    def profiled(self, name=None):
+        """Decorator recording each call of the function as stage name, defaulting to the qualified function name."""
+
+        def decorator(func):
+            stage_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def report(self):
+        lines = [
+            f"{'stage':<45} {'calls':>8} {'time [s]':>10} {'per call [ms]':>14} {'net blocks':>10} {'net mem [B]':>12}"
+        ]
+        for name, stats in sorted(self.stats.items(), key=lambda item: item[1]["time"], reverse=True):
+            memory = "-" if stats["memory"] is None else str(stats["memory"])
+            lines.append(
+                f"{name:<45} {stats['calls']:>8} {stats['time']:>10.4f} "
+                f"{1000 * stats['time'] / stats['calls']:>14.4f} {stats['net_blocks']:>10} {memory:>12}"
+            )
+        return "\n".join(lines)
+
+
+profiler = Profiler()
@@ -1,10 +1,13 @@
 import mendeleev
 
+from utils.profiling import profiler
+
 
 class Compound:
     _elements = {}
     debug = False
 
+    @profiler.profiled()
     def __init__(self, compound_dict=None, **kwargs):
         self._compound_dict = compound_dict or {}
         self._compound_dict.update(kwargs)
@@ -19,6 +22,7 @@ class Compound:
         return list(self._compound_dict.keys())
 
     @classmethod
+    @profiler.profiled()
     def from_wt_percent(cls, compound_dict, **kwargs):
         _compound_dict = compound_dict or {}
         _compound_dict.update(kwargs)
@@ -80,11 +84,13 @@ class Compound:
         return sum(self._compound_dict.values())
 
     @property
+    @profiler.profiled()
     def wt_percent_dict(self):
         return {element: self._elements[element].atomic_weight * c / self.total_mass
                 for element, c in self._compound_dict.items()}
 
     @property
+    @profiler.profiled()
     def at_percent_dict(self):
         return {element: c / self.number_of_atoms
                 for element, c in self._compound_dict.items()}